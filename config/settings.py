@@ -3,7 +3,7 @@ Django settings for j-shi.ng project.
 """
 
 from pathlib import Path
-from decouple import config
+from decouple import Csv, config
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -121,3 +121,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = 'portal_home'
 LOGOUT_REDIRECT_URL = 'login'
+
+# Hosts serving /go/ short links; destinations on these hosts are resolved
+# to their final destination when a link is saved
+SHORT_LINK_HOSTS = config('SHORT_LINK_HOSTS', default='j-shi.ng,www.j-shi.ng', cast=Csv(post_process=lambda hosts: [host.lower() for host in hosts]))
@@ -1,17 +1,21 @@
 from django.contrib import admin
 from .models import ShortLink
+from .routing import collect_dependents, resolve_links
 
 
 @admin.register(ShortLink)
 class ShortLinkAdmin(admin.ModelAdmin):
-    list_display = ['slug', 'destination_url', 'jump_type', 'click_count', 'is_active', 'created_at']
-    list_filter = ['jump_type', 'is_active', 'created_at']
+    list_display = ['slug', 'destination_url', 'jump_type', 'click_count', 'is_active', 'active_from', 'expires_at', 'created_at']
+    list_filter = ['jump_type', 'is_active', 'strict_match', 'active_from', 'expires_at', 'created_at']
     search_fields = ['slug', 'destination_url', 'description']
-    readonly_fields = ['click_count', 'created_at', 'updated_at']
+    readonly_fields = ['resolved_url', 'click_count', 'created_at', 'updated_at']
     
     fieldsets = (
         ('Short Link Configuration', {
-            'fields': ('slug', 'destination_url', 'jump_type', 'is_active')
+            'fields': ('slug', 'strict_match', 'destination_url', 'resolved_url', 'jump_type', 'is_active')
+        }),
+        ('Schedule', {
+            'fields': ('active_from', 'expires_at', 'expired_url')
         }),
         ('Details', {
             'fields': ('description',)
@@ -21,3 +25,10 @@ class ShortLinkAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
     )
+    
+    def delete_queryset(self, request, queryset):
+        """Bulk delete, then re-resolve links that redirected through the deleted ones."""
+        pks = set(queryset.values_list('pk', flat=True))
+        dependents = collect_dependents(pks)
+        super().delete_queryset(request, queryset)
+        resolve_links(link for link in dependents if link.pk not in pks)
@@ -8,7 +8,10 @@ from .models import ShortLink
 class ShortLinkForm(forms.ModelForm):
     class Meta:
         model = ShortLink
-        fields = ['slug', 'destination_url', 'jump_type', 'description', 'is_active']
+        fields = [
+            'slug', 'strict_match', 'destination_url', 'jump_type', 'description', 'is_active',
+            'active_from', 'expires_at', 'expired_url',
+        ]
         widgets = {
             'slug': forms.TextInput(attrs={
                 'class': 'form-control',
@@ -29,6 +32,21 @@ class ShortLinkForm(forms.ModelForm):
             'is_active': forms.CheckboxInput(attrs={
                 'class': 'form-check-input',
             }),
+            'strict_match': forms.CheckboxInput(attrs={
+                'class': 'form-check-input',
+            }),
+            'active_from': forms.DateTimeInput(attrs={
+                'class': 'form-control',
+                'type': 'datetime-local',
+            }, format='%Y-%m-%dT%H:%M'),
+            'expires_at': forms.DateTimeInput(attrs={
+                'class': 'form-control',
+                'type': 'datetime-local',
+            }, format='%Y-%m-%dT%H:%M'),
+            'expired_url': forms.TextInput(attrs={
+                'class': 'form-control',
+                'placeholder': 'Optional fallback, e.g. https://example.com/campaign-ended',
+            }),
         }
     
     def clean_slug(self):
@@ -68,38 +86,50 @@ class ShortLinkForm(forms.ModelForm):
     
     def clean_destination_url(self):
         """Validate URL/URI format - allow various protocols."""
-        url = self.cleaned_data['destination_url'].strip()
-        
-        # Check if it has a protocol/scheme
-        if not re.match(r'^[a-zA-Z][a-zA-Z0-9+.-]*:', url):
-            raise forms.ValidationError(
-                'Destination must include a protocol (e.g., https://, mailto:, tel:, or custom app protocol)'
-            )
-        
-        # For HTTP/HTTPS, do standard validation
-        if url.startswith(('http://', 'https://')):
-            validator = URLValidator(schemes=['http', 'https'])
-            try:
-                validator(url)
-            except ValidationError:
-                raise forms.ValidationError('Invalid HTTP/HTTPS URL format')
-        
-        # For mailto:, do basic validation
-        elif url.startswith('mailto:'):
-            email_part = url[7:]  # Remove 'mailto:'
-            if not email_part or '@' not in email_part.split('?')[0]:
-                raise forms.ValidationError('Invalid mailto: format. Example: mailto:user@example.com')
-        
-        # For tel:, do basic validation
-        elif url.startswith('tel:'):
-            phone_part = url[4:]  # Remove 'tel:'
-            if not phone_part or not re.match(r'^[0-9+\-() ]+$', phone_part):
-                raise forms.ValidationError('Invalid tel: format. Example: tel:+1234567890')
-        
-        # For other protocols (custom apps, etc.), just ensure it's not empty after the colon
-        else:
-            protocol, _, content = url.partition(':')
-            if not content:
-                raise forms.ValidationError(f'Invalid {protocol}: URI - missing content after protocol')
-        
-        return url
+        return validate_destination(self.cleaned_data['destination_url'])
+    
+    def clean_expired_url(self):
+        """Validate the optional fallback URL with the same rules as the destination."""
+        url = self.cleaned_data['expired_url'].strip()
+        if not url:
+            return url
+        return validate_destination(url)
+
+
+def validate_destination(url):
+    """Validate a destination URL/URI and return it stripped of whitespace."""
+    url = url.strip()
+    
+    # Check if it has a protocol/scheme
+    if not re.match(r'^[a-zA-Z][a-zA-Z0-9+.-]*:', url):
+        raise forms.ValidationError(
+            'Destination must include a protocol (e.g., https://, mailto:, tel:, or custom app protocol)'
+        )
+    
+    # For HTTP/HTTPS, do standard validation
+    if url.startswith(('http://', 'https://')):
+        validator = URLValidator(schemes=['http', 'https'])
+        try:
+            validator(url)
+        except ValidationError:
+            raise forms.ValidationError('Invalid HTTP/HTTPS URL format')
+    
+    # For mailto:, do basic validation
+    elif url.startswith('mailto:'):
+        email_part = url[7:]  # Remove 'mailto:'
+        if not email_part or '@' not in email_part.split('?')[0]:
+            raise forms.ValidationError('Invalid mailto: format. Example: mailto:user@example.com')
+    
+    # For tel:, do basic validation
+    elif url.startswith('tel:'):
+        phone_part = url[4:]  # Remove 'tel:'
+        if not phone_part or not re.match(r'^[0-9+\-() ]+$', phone_part):
+            raise forms.ValidationError('Invalid tel: format. Example: tel:+1234567890')
+    
+    # For other protocols (custom apps, etc.), just ensure it's not empty after the colon
+    else:
+        protocol, _, content = url.partition(':')
+        if not content:
+            raise forms.ValidationError(f'Invalid {protocol}: URI - missing content after protocol')
+    
+    return url
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from shortener.models import ShortLink
+from shortener.routing import resolve_links
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute the precomputed final destination of every short link. '
+        'Run after loading links in bulk (e.g. with loaddata), which bypasses save-time resolution.'
+    )
+    
+    def handle(self, *args, **options):
+        updated = resolve_links(ShortLink.objects.all())
+        self.stdout.write(self.style.SUCCESS(f'Resolved {updated} short link(s)'))
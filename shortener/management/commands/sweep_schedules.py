@@ -0,0 +1,60 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Case, Q, Value, When
+from django.utils import timezone
+from shortener.models import ShortLink
+from shortener.routing import RedirectLoopError, refresh_dependents, resolve_link
+
+
+class Command(BaseCommand):
+    help = (
+        'Switch on links whose activation time has passed and switch off links '
+        'whose expiry time has passed. Intended to be run periodically (e.g. from cron).'
+    )
+    
+    def handle(self, *args, **options):
+        now = timezone.now()
+        
+        # Both conditions are served by the (is_active, active_from) and
+        # (is_active, expires_at) indexes, so only due rows are touched
+        due_for_activation = Q(is_active=False, active_from__lte=now)
+        due_for_expiry = Q(is_active=True, expires_at__lte=now)
+        
+        with transaction.atomic():
+            due = []
+            looping = []
+            for link in ShortLink.objects.select_for_update().filter(due_for_activation | due_for_expiry):
+                # Links whose destination leads back to themselves are never switched on
+                if not link.is_active:
+                    try:
+                        resolve_link(link)
+                    except RedirectLoopError as e:
+                        self.stderr.write(f'Not activating /go/{link.slug}, its destination leads back to itself: {e}')
+                        looping.append(link.pk)
+                due.append(link.pk)
+            
+            # Flip every due link in a single UPDATE. Every due link has its
+            # activation time cleared so it is not picked up again, including
+            # links refused above and links whose whole window has passed,
+            # which are both left switched off.
+            updated = ShortLink.objects.filter(pk__in=due).update(
+                is_active=Case(
+                    When(pk__in=looping, then=Value(False)),
+                    When(expires_at__lte=now, then=Value(False)),
+                    default=Value(True),
+                ),
+                is_expired=Case(
+                    When(pk__in=looping, then=Value(False)),
+                    When(expires_at__lte=now, then=Value(True)),
+                    default=Value(False),
+                ),
+                active_from=None,
+                updated_at=now,
+            )
+            
+            # Redirect chains precomputed through the flipped links are now stale
+            refreshed = refresh_dependents(due) if due else 0
+        
+        self.stdout.write(self.style.SUCCESS(
+            f'Updated {updated} scheduled link(s), re-resolved {refreshed} dependent link(s)'
+        ))
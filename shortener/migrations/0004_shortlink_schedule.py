@@ -0,0 +1,36 @@
+# Generated by Django 5.2.8 on 2026-10-19 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shortener', '0003_alter_shortlink_destination_url'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shortlink',
+            name='active_from',
+            field=models.DateTimeField(blank=True, help_text='Optional time at which the link is switched on. Cleared once the link goes live', null=True),
+        ),
+        migrations.AddField(
+            model_name='shortlink',
+            name='expires_at',
+            field=models.DateTimeField(blank=True, help_text='Optional time after which the link is switched off', null=True),
+        ),
+        migrations.AddField(
+            model_name='shortlink',
+            name='expired_url',
+            field=models.CharField(blank=True, help_text='Optional URL to send visitors to once the link has expired (otherwise returns 404)', max_length=2048),
+        ),
+        migrations.AddIndex(
+            model_name='shortlink',
+            index=models.Index(fields=['is_active', 'active_from'], name='shortlink_activation_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='shortlink',
+            index=models.Index(fields=['is_active', 'expires_at'], name='shortlink_expiry_idx'),
+        ),
+    ]
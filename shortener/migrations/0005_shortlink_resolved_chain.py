@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-19 10:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shortener', '0004_shortlink_schedule'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shortlink',
+            name='resolved_url',
+            field=models.CharField(blank=True, editable=False, help_text='Final destination when the destination is another short link, precomputed on save', max_length=2048),
+        ),
+        migrations.AddField(
+            model_name='shortlink',
+            name='resolved_chain',
+            field=models.JSONField(blank=True, default=list, editable=False, help_text='Short links skipped over by resolved_url, whose clicks are still counted'),
+        ),
+        migrations.AddField(
+            model_name='shortlink',
+            name='next_hop',
+            field=models.ForeignKey(blank=True, editable=False, help_text="The short link this link's destination points at, if any", null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='dependents', to='shortener.shortlink'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.8 on 2026-10-19 11:00
+
+from urllib.parse import unquote
+
+from django.db import migrations, models
+
+
+def populate_slug_normalized(apps, schema_editor):
+    # Mirrors shortener.models.normalize_slug as of this migration
+    ShortLink = apps.get_model('shortener', 'ShortLink')
+    links = list(ShortLink.objects.all())
+    for link in links:
+        slug = unquote(link.slug).casefold()
+        if link.jump_type not in ('prefix', 'prefix-forward'):
+            slug = slug.rstrip('/')
+        link.slug_normalized = slug
+    ShortLink.objects.bulk_update(links, ['slug_normalized'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shortener', '0005_shortlink_resolved_chain'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shortlink',
+            name='slug_normalized',
+            field=models.CharField(db_index=True, default='', editable=False, help_text='Case-folded, percent-decoded slug used for lookups, set on save', max_length=255),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='shortlink',
+            name='strict_match',
+            field=models.BooleanField(default=False, help_text='Only match the slug exactly as written (case, trailing slash and percent-encoding)'),
+        ),
+        migrations.RunPython(populate_slug_normalized, migrations.RunPython.noop),
+    ]
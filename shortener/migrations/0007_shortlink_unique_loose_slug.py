@@ -0,0 +1,39 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:00
+
+from django.db import migrations, models
+
+
+def resolve_slug_collisions(apps, schema_editor):
+    # Existing rows may share a normalized slug. Keep one of them loose,
+    # preferring the one already written in canonical form and then the
+    # oldest, and make the rest strict so they still match their exact slug.
+    ShortLink = apps.get_model('shortener', 'ShortLink')
+    links = sorted(
+        ShortLink.objects.filter(strict_match=False),
+        key=lambda link: (link.slug != link.slug_normalized, link.created_at, link.pk)
+    )
+    
+    kept = set()
+    to_strict = []
+    for link in links:
+        if link.slug_normalized in kept:
+            to_strict.append(link.pk)
+        else:
+            kept.add(link.slug_normalized)
+    
+    ShortLink.objects.filter(pk__in=to_strict).update(strict_match=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shortener', '0006_shortlink_slug_normalized'),
+    ]
+
+    operations = [
+        migrations.RunPython(resolve_slug_collisions, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='shortlink',
+            constraint=models.UniqueConstraint(condition=models.Q(strict_match=False), fields=('slug_normalized',), name='shortlink_unique_loose_slug'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-19 13:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shortener', '0007_shortlink_unique_loose_slug'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shortlink',
+            name='destination_path',
+            field=models.CharField(blank=True, db_index=True, editable=False, help_text='Normalized /go/ path the destination points at, if internal, used to find links a new slug captures', max_length=2048),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shortener', '0008_shortlink_destination_path'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='shortlink',
+            name='slug_normalized',
+            field=models.CharField(db_index=True, editable=False, help_text='Case-folded, percent-decoded slug used for lookups, set on save', max_length=765),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:48
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def mark_expired_links(apps, schema_editor):
+    # Inactive links past their expiry have been served their fallback so far, so keep doing that
+    ShortLink = apps.get_model('shortener', 'ShortLink')
+    ShortLink.objects.filter(is_active=False, expires_at__lte=timezone.now()).update(is_expired=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shortener', '0009_alter_shortlink_slug_normalized_max_length'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shortlink',
+            name='is_expired',
+            field=models.BooleanField(default=False, editable=False, help_text='Set when the link was switched off by its expiry time. Only expired links use expired_url'),
+        ),
+        migrations.RunPython(mark_expired_links, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,28 @@
+from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models import F
 from django.utils import timezone
+from urllib.parse import unquote
+
+
+def normalize_path(path, jump_type):
+    """
+    Return the canonical form of an already decoded request path: case-folded
+    and, for non-prefix types, without trailing slashes.
+    """
+    path = path.casefold()
+    if jump_type not in ('prefix', 'prefix-forward'):
+        path = path.rstrip('/')
+    return path
+
+
+def normalize_slug(slug, jump_type):
+    """
+    Return the canonical form of a stored slug used for lookups. Slugs may be
+    saved percent-encoded, so they are decoded the way requests are before
+    being normalized like a request path.
+    """
+    return normalize_path(unquote(slug), jump_type)
 
 
 class ShortLink(models.Model):
@@ -17,6 +40,17 @@ class ShortLink(models.Model):
         unique=True,
         help_text="The path after /go/ (can include slashes, e.g., 'google' or 'social/twitter')"
     )
+    slug_normalized = models.CharField(
+        # Case folding can triple a character's length (e.g. 'ΐ'), so leave room for any valid slug
+        max_length=765,
+        db_index=True,
+        editable=False,
+        help_text="Case-folded, percent-decoded slug used for lookups, set on save"
+    )
+    strict_match = models.BooleanField(
+        default=False,
+        help_text="Only match the slug exactly as written (case, trailing slash and percent-encoding)"
+    )
     destination_url = models.CharField(
         max_length=2048,
         help_text="The destination URL or URI (supports http://, https://, mailto:, tel:, and custom app protocols)"
@@ -41,19 +75,190 @@ class ShortLink(models.Model):
         default=True,
         help_text="Inactive links will return 404"
     )
+    is_expired = models.BooleanField(
+        default=False,
+        editable=False,
+        help_text="Set when the link was switched off by its expiry time. Only expired links use expired_url"
+    )
+    active_from = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Optional time at which the link is switched on. Cleared once the link goes live"
+    )
+    expires_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Optional time after which the link is switched off"
+    )
+    expired_url = models.CharField(
+        max_length=2048,
+        blank=True,
+        help_text="Optional URL to send visitors to once the link has expired (otherwise returns 404)"
+    )
+    resolved_url = models.CharField(
+        max_length=2048,
+        blank=True,
+        editable=False,
+        help_text="Final destination when the destination is another short link, precomputed on save"
+    )
+    resolved_chain = models.JSONField(
+        default=list,
+        blank=True,
+        editable=False,
+        help_text="Short links skipped over by resolved_url, whose clicks are still counted"
+    )
+    destination_path = models.CharField(
+        max_length=2048,
+        blank=True,
+        db_index=True,
+        editable=False,
+        help_text="Normalized /go/ path the destination points at, if internal, used to find links a new slug captures"
+    )
+    next_hop = models.ForeignKey(
+        'self',
+        null=True,
+        blank=True,
+        editable=False,
+        on_delete=models.SET_NULL,
+        related_name='dependents',
+        help_text="The short link this link's destination points at, if any"
+    )
     
     class Meta:
         ordering = ['-created_at']
         verbose_name = 'Short Link'
         verbose_name_plural = 'Short Links'
+        indexes = [
+            # Used by the sweep_schedules command to find due links
+            models.Index(fields=['is_active', 'active_from'], name='shortlink_activation_idx'),
+            models.Index(fields=['is_active', 'expires_at'], name='shortlink_expiry_idx'),
+        ]
+        constraints = [
+            # Only strict links may share a normalized slug, so each lookup has one loose match
+            models.UniqueConstraint(
+                fields=['slug_normalized'],
+                condition=models.Q(strict_match=False),
+                name='shortlink_unique_loose_slug',
+            ),
+        ]
     
     def __str__(self):
         return f"/go/{self.slug} → {self.destination_url}"
     
+    def clean(self):
+        """Validate the slug and schedule, derive is_active from the schedule and reject redirect loops."""
+        super().clean()
+        
+        # Reject slugs that would be matched by the same requests as an existing
+        # link. Strict links only match their exact slug, so they can coexist.
+        if self.slug and self.jump_type:
+            self.slug_normalized = normalize_slug(self.slug, self.jump_type)
+            if not self.strict_match:
+                collision = ShortLink.objects.filter(
+                    slug_normalized=self.slug_normalized,
+                    strict_match=False
+                ).exclude(pk=self.pk).exclude(slug=self.slug).first()
+                if collision:
+                    raise ValidationError({
+                        'slug': f'This slug conflicts with the existing link /go/{collision.slug} '
+                                '(slugs are matched case-insensitively, ignoring trailing slashes and percent-encoding)'
+                    })
+        
+        if self.active_from and self.expires_at and self.expires_at <= self.active_from:
+            raise ValidationError({
+                'expires_at': 'Expiry time must be later than the activation time'
+            })
+        
+        now = timezone.now()
+        
+        # Links waiting for their activation time stay off until the sweeper switches them on
+        if self.active_from:
+            if self.active_from > now:
+                self.is_active = False
+            else:
+                self.active_from = None
+        
+        # Only a link switched off by its expiry time redirects to expired_url
+        self.is_expired = self.has_expired
+        if self.is_expired:
+            self.is_active = False
+        
+        from .routing import RedirectLoopError, follow_chain, links_pointing_at, resolve_link
+        try:
+            resolve_link(self)
+        except RedirectLoopError as e:
+            raise ValidationError({
+                'destination_url': f'This destination leads back to itself: {e}'
+            })
+        
+        # The fallback is a second redirect target, so it must not lead back here either
+        if self.expired_url:
+            try:
+                for _hop in follow_chain(self, self.expired_url, self):
+                    pass
+            except RedirectLoopError as e:
+                raise ValidationError({
+                    'expired_url': f'This fallback leads back to itself: {e}'
+                })
+        
+        # Links already pointing at this slug must not start looping once it is saved
+        if self.slug and self.jump_type:
+            for link in links_pointing_at(self):
+                try:
+                    resolve_link(link, pending=self)
+                except RedirectLoopError as e:
+                    raise ValidationError({
+                        'destination_url': f'Saving this link would make /go/{link.slug} loop: {e}'
+                    })
+    
+    def save(self, *args, **kwargs):
+        """Save the link, precomputing its redirect chain and refreshing links that depend on it."""
+        from .routing import RedirectLoopError, links_pointing_at, refresh_dependents, resolve_link
+        self.slug_normalized = normalize_slug(self.slug, self.jump_type)
+        
+        try:
+            resolve_link(self)
+        except RedirectLoopError:
+            # Rejected by clean() for forms; direct saves are stored unresolved
+            self.resolved_url = ''
+            self.resolved_chain = []
+        
+        super().save(*args, **kwargs)
+        
+        # Links pointing at this slug may not have been tracked yet (new or renamed link)
+        refresh_dependents([self.pk], extra=links_pointing_at(self))
+    
+    def delete(self, *args, **kwargs):
+        """Delete the link and re-resolve links that redirected through it."""
+        from .routing import collect_dependents, resolve_links
+        pk = self.pk
+        dependents = collect_dependents([pk])
+        result = super().delete(*args, **kwargs)
+        resolve_links(link for link in dependents if link.pk != pk)
+        return result
+    
+    @property
+    def has_expired(self):
+        """Return True if the link has passed its expiry time."""
+        return self.expires_at is not None and self.expires_at <= timezone.now()
+    
+    @property
+    def is_scheduled(self):
+        """Return True if the link is waiting for its activation time."""
+        return self.active_from is not None and not self.is_active
+    
     def increment_clicks(self):
-        """Increment the click counter."""
+        """Increment the click counter of this link and of every link its resolved chain skips."""
+        pks = [self.pk]
+        if self.is_active:
+            pks += [hop['id'] for hop in self.resolved_chain]
+        ShortLink.objects.filter(pk__in=pks).update(click_count=F('click_count') + 1)
         self.click_count += 1
-        self.save(update_fields=['click_count'])
+    
+    @property
+    def final_destination(self):
+        """Return the precomputed final destination, falling back to destination_url."""
+        return self.resolved_url or self.destination_url
     
     @property
     def short_url(self):
@@ -0,0 +1,373 @@
+"""
+Routing helpers shared by the redirect view and save-time chain resolution.
+"""
+import logging
+from urllib.parse import urlencode, urlparse, parse_qs, parse_qsl, unquote, urlunparse
+from django.conf import settings
+from django.db.models import Q
+from .models import ShortLink, normalize_path, normalize_slug
+
+logger = logging.getLogger(__name__)
+
+EXACT_TYPES = ['simple', 'forward']
+PREFIX_TYPES = ['prefix', 'prefix-forward']
+FORWARD_TYPES = ['forward', 'prefix-forward']
+
+
+class RedirectLoopError(Exception):
+    """Raised when a chain of internal short links leads back to itself."""
+    
+    def __init__(self, slugs):
+        self.slugs = slugs
+        super().__init__(' → '.join(f'/go/{slug}' for slug in slugs))
+
+
+def routable_links():
+    """
+    Return a Q matching links that may serve a redirect: active links, plus
+    links switched off by their expiry time that have a fallback URL configured.
+    """
+    return Q(is_active=True) | (Q(is_expired=True) & ~Q(expired_url=''))
+
+
+def pick_exact_match(candidates, path):
+    """
+    Choose which of the exact-mode links sharing path's normalized slug serves
+    path: the link with exactly this slug, otherwise the non-strict one.
+    """
+    loose_match = None
+    for candidate in candidates:
+        if candidate.slug == path:
+            return candidate
+        if not candidate.strict_match:
+            loose_match = candidate
+    return loose_match
+
+
+def match_link(path, routable=None, exclude=None):
+    """
+    Find the link serving /go/<path>.
+    Priority: exact matches (simple/forward) > prefix matches (prefix/prefix-forward)
+    path is the request path as decoded by Django; it is never decoded again.
+    Matching is case-insensitive, ignores trailing slashes on exact matches and
+    treats percent-encoded slugs like their decoded form, except for links
+    with strict_match set.
+    The link with pk exclude, if given, is left out of the search.
+    Returns a (link, extra_path) tuple, or (None, '') if nothing matches.
+    """
+    if routable is None:
+        routable = routable_links()
+    links = ShortLink.objects.exclude(pk=exclude) if exclude is not None else ShortLink.objects.all()
+    
+    # First, try exact match with simple or forward mode in a single indexed probe.
+    # Several rows can only share a normalized slug when all but one are strict.
+    candidates = links.filter(
+        routable,
+        slug_normalized=normalize_path(path, 'simple'),
+        jump_type__in=EXACT_TYPES
+    )
+    exact_match = pick_exact_match(candidates, path)
+    if exact_match:
+        return exact_match, ''
+    
+    # Look for prefix matches - find all prefix-type links that could match
+    prefix_links = links.filter(
+        routable,
+        jump_type__in=PREFIX_TYPES,
+        slug_normalized__endswith='/'
+    ).order_by('-slug_normalized')  # Order by slug descending to match longest prefix first
+    
+    for candidate in prefix_links:
+        extra_path = prefix_extra(candidate, path)
+        if extra_path is not None:
+            return candidate, extra_path
+    
+    return None, ''
+
+
+def prefix_extra(candidate, path):
+    """
+    Return the extra path after candidate's prefix if the prefix link
+    candidate matches path, otherwise None.
+    """
+    # Check if the path starts with this prefix
+    if path.startswith(candidate.slug):
+        # Extract the extra path after the prefix
+        return path[len(candidate.slug):]
+    if not candidate.strict_match and normalize_path(path, 'prefix').startswith(candidate.slug_normalized):
+        # The extra path always comes from the original path, at the offset
+        # matching the prefix length in case-folded form
+        offset = casefold_offset(path, len(candidate.slug_normalized))
+        if offset is not None:
+            return path[offset:]
+    return None
+
+
+def pending_match(link, path, target):
+    """
+    Return the extra path if link, in its unsaved state, would serve path
+    instead of target (the saved link match_link found), otherwise None.
+    Applies the same priorities as match_link.
+    """
+    if link.jump_type in EXACT_TYPES:
+        if link.slug_normalized != normalize_path(path, 'simple'):
+            return None
+        rivals = [target] if target is not None and target.jump_type in EXACT_TYPES else []
+        return '' if pick_exact_match(rivals + [link], path) is link else None
+    
+    # Exact matches always win over prefixes, then prefixes are tried in descending order
+    if target is not None and (
+        target.jump_type in EXACT_TYPES or target.slug_normalized > link.slug_normalized
+    ):
+        return None
+    return prefix_extra(link, path)
+
+
+def casefold_offset(path, length):
+    """
+    Return the index in path at which its case-folded form reaches the given
+    length, or None if that length falls inside the folding of one character.
+    """
+    folded_length = 0
+    for index, char in enumerate(path):
+        if folded_length == length:
+            return index
+        folded_length += len(char.casefold())
+    return len(path) if folded_length == length else None
+
+
+def build_destination(destination, jump_type, extra_path, params):
+    """
+    Build the final URL for a matched link from its destination, the extra
+    path captured by prefix modes and the incoming query parameters.
+    """
+    # Handle prefix modes: append extra path
+    if jump_type in PREFIX_TYPES and extra_path:
+        # Ensure destination ends with / if extra_path doesn't start with /
+        if not destination.endswith('/') and not extra_path.startswith('/'):
+            destination = destination + '/'
+        destination = destination + extra_path
+    
+    # If jump type is 'forward' or 'prefix-forward', append query parameters
+    if jump_type in FORWARD_TYPES and params:
+        # Parse the destination URL
+        parsed_url = urlparse(destination)
+        
+        # Get existing query parameters from destination
+        existing_params = parse_qs(parsed_url.query)
+        
+        # Merge with incoming parameters (incoming params take precedence)
+        merged_params = {**existing_params}
+        for key, value in params.items():
+            merged_params[key] = [value]
+        
+        # Build new query string
+        # Flatten the list values (take first value for each key)
+        flat_params = {k: v[0] if isinstance(v, list) else v for k, v in merged_params.items()}
+        new_query = urlencode(flat_params)
+        
+        # Reconstruct URL with new query string
+        destination = urlunparse((
+            parsed_url.scheme,
+            parsed_url.netloc,
+            parsed_url.path,
+            parsed_url.params,
+            new_query,
+            parsed_url.fragment
+        ))
+    
+    return destination
+
+
+def internal_path(url):
+    """
+    If url points at one of our own short links, return its (path, params)
+    with path relative to /go/. Otherwise return (None, None).
+    """
+    parsed_url = urlparse(url)
+    if parsed_url.scheme not in ('http', 'https'):
+        return None, None
+    if parsed_url.hostname not in settings.SHORT_LINK_HOSTS:
+        return None, None
+    if not parsed_url.path.startswith('/go/'):
+        return None, None
+    # Decode the path once and mirror request.GET.items(), where the last
+    # value of a repeated key wins, as Django does for real requests
+    path = unquote(parsed_url.path[len('/go/'):])
+    return path, dict(parse_qsl(parsed_url.query, keep_blank_values=True))
+
+
+def follow_chain(origin, url, pending):
+    """
+    Walk the internal short links starting at url from origin, the way the
+    redirect view would, with pending taking the place of its saved row.
+    Yields a (path, target, url) tuple per hop, where target is the link
+    serving path and url is where target sends the visitor next. The last
+    hop has target None if no link serves its path.
+    
+    Raises RedirectLoopError if the chain leads back to origin or to a link
+    already in it.
+    """
+    def key(link):
+        return 'pending' if link is pending else link.pk
+    
+    seen = {key(origin)}
+    slugs = [origin.slug]
+    
+    while True:
+        path, params = internal_path(url)
+        if path is None:
+            return
+        
+        # Match regardless of status so scheduled targets are still tracked
+        target, extra_path = match_link(path, routable=Q(), exclude=pending.pk)
+        pending_extra = pending_match(pending, path, target)
+        if pending_extra is not None:
+            target, extra_path = pending, pending_extra
+        
+        if target is None:
+            yield path, None, None
+            return
+        
+        if key(target) in seen:
+            raise RedirectLoopError(slugs + [target.slug])
+        seen.add(key(target))
+        slugs.append(target.slug)
+        
+        url = build_destination(target.destination_url, target.jump_type, extra_path, params)
+        yield path, target, url
+
+
+def resolve_link(link, pending=None):
+    """
+    Follow the chain of internal short links starting at link's destination
+    and store the precomputed result on link (without saving it):
+    
+    - resolved_url: the final destination, or '' if no hop could be skipped
+    - resolved_chain: the links skipped over, so their clicks are still counted
+    - next_hop: the first internal link, used as the reverse-dependency index
+    - destination_path: the normalized path of the first internal hop, even
+      when no link serves it yet
+    
+    A hop is only skipped when doing so cannot change what the visitor ends
+    up at: the target must be active, and if link forwards visitor parameters
+    every hop must forward them too. Prefix links are never resolved since
+    their destination depends on the requested path.
+    
+    The chain is followed to its end regardless of whether hops can be
+    skipped, so loops through inactive or scheduled links and through prefix
+    links are caught before those links are switched on. pending is an
+    unsaved link matched in place of its saved row; it defaults to link.
+    
+    Raises RedirectLoopError if the chain leads back to a link already in it.
+    """
+    if pending is None:
+        pending = link
+    
+    link.resolved_url = ''
+    link.resolved_chain = []
+    link.next_hop = None
+    link.destination_path = ''
+    
+    if link.jump_type in PREFIX_TYPES:
+        check_prefix_loop(link)
+    
+    forwards = link.jump_type in FORWARD_TYPES
+    chain = []
+    skipping = link.jump_type not in PREFIX_TYPES
+    
+    for index, (path, target, url) in enumerate(follow_chain(link, link.destination_url, pending)):
+        if index == 0:
+            link.destination_path = normalize_path(path, 'simple')
+            link.next_hop = target
+        
+        if target is None:
+            break
+        
+        # Past the first hop that cannot be skipped, keep walking only to detect loops
+        if not target.is_active or (forwards and target.jump_type not in FORWARD_TYPES):
+            skipping = False
+        
+        if skipping:
+            chain.append(target)
+            link.resolved_url = url
+    
+    if chain:
+        link.resolved_chain = [{'id': hop.pk, 'slug': hop.slug} for hop in chain]
+
+
+def check_prefix_loop(link):
+    """
+    Raise RedirectLoopError if the prefix link's own destination, with any
+    extra path appended, falls back under its own prefix.
+    """
+    path, _ = internal_path(link.destination_url)
+    if path is None:
+        return
+    # The redirect view appends the extra path after a slash
+    if path and not path.endswith('/'):
+        path = path + '/'
+    if prefix_extra(link, path) is not None:
+        raise RedirectLoopError([link.slug, link.slug])
+
+
+def resolve_links(links):
+    """
+    Re-resolve the given links and write the results in a single bulk update.
+    Links caught in a loop are left unresolved. Returns the number of links updated.
+    """
+    links = list(links)
+    for link in links:
+        try:
+            resolve_link(link)
+        except RedirectLoopError as e:
+            logger.warning(f'Redirect loop detected for /go/{link.slug}: {e}')
+            link.resolved_url = ''
+            link.resolved_chain = []
+    
+    return ShortLink.objects.bulk_update(
+        links, ['resolved_url', 'resolved_chain', 'next_hop', 'destination_path']
+    )
+
+
+def collect_dependents(pks, extra=None):
+    """
+    Return every link that redirects through any of the links in pks,
+    following the next_hop index transitively. Links in the optional extra
+    queryset are included as well, along with their own dependents.
+    """
+    dependents = {}
+    frontier = set(pks)
+    query = Q(next_hop__in=frontier)
+    if extra is not None:
+        query |= Q(pk__in=extra.values('pk'))
+    
+    while frontier:
+        found = [link for link in ShortLink.objects.filter(query) if link.pk not in dependents]
+        for link in found:
+            dependents[link.pk] = link
+        frontier = {link.pk for link in found}
+        query = Q(next_hop__in=frontier)
+    
+    return list(dependents.values())
+
+
+def links_pointing_at(link):
+    """
+    Return a queryset of links whose destination could be served by link,
+    found through the indexed destination_path column with the same
+    normalization match_link applies. It may include a few links link does
+    not actually serve (e.g. ones taken by a strict link), which re-resolving
+    leaves unchanged.
+    """
+    slug_normalized = normalize_slug(link.slug, link.jump_type)
+    if link.jump_type in PREFIX_TYPES:
+        query = Q(destination_path__startswith=slug_normalized) | Q(destination_path=slug_normalized.rstrip('/'))
+    else:
+        query = Q(destination_path=slug_normalized)
+    return ShortLink.objects.filter(query).exclude(pk=link.pk)
+
+
+def refresh_dependents(pks, extra=None):
+    """Re-resolve every link whose redirect chain passes through any of the links in pks."""
+    return resolve_links(collect_dependents(pks, extra))
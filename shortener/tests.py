@@ -0,0 +1,341 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from .forms import ShortLinkForm
+from .models import ShortLink
+
+
+def form_data(**overrides):
+    """Return valid ShortLinkForm data, with overrides applied."""
+    data = {
+        'slug': 'example',
+        'destination_url': 'https://example.com',
+        'jump_type': 'simple',
+        'description': '',
+        'is_active': True,
+        'strict_match': False,
+        'active_from': '',
+        'expires_at': '',
+        'expired_url': '',
+    }
+    data.update(overrides)
+    return data
+
+
+def create_link(slug, destination_url, **fields):
+    """Create a link directly, bypassing form validation."""
+    return ShortLink.objects.create(slug=slug, destination_url=destination_url, **fields)
+
+
+@mock.patch('shortener.views.send_ga4_event')
+class ChainResolutionTests(TestCase):
+
+    def test_chain_resolves_to_final_destination(self, send_ga4_event):
+        final = create_link('y', 'https://example.com/final')
+        link = create_link('x', 'https://j-shi.ng/go/y')
+
+        self.assertEqual(link.resolved_url, 'https://example.com/final')
+        self.assertEqual(link.resolved_chain, [{'id': final.pk, 'slug': 'y'}])
+        self.assertEqual(link.next_hop, final)
+
+        response = self.client.get('/go/x')
+        self.assertRedirects(response, 'https://example.com/final', fetch_redirect_response=False)
+
+    def test_clicks_and_ga_events_are_attributed_to_every_link_in_chain(self, send_ga4_event):
+        create_link('z', 'https://example.com/final')
+        create_link('y', 'https://j-shi.ng/go/z')
+        create_link('x', 'https://j-shi.ng/go/y')
+
+        self.client.get('/go/x')
+
+        clicks = dict(ShortLink.objects.values_list('slug', 'click_count'))
+        self.assertEqual(clicks, {'x': 1, 'y': 1, 'z': 1})
+        slugs = [call.kwargs['event_params']['slug'] for call in send_ga4_event.call_args_list]
+        self.assertEqual(slugs, ['x', 'y', 'z'])
+
+    def test_dependents_are_recomputed_when_downstream_link_changes(self, send_ga4_event):
+        create_link('z', 'https://example.com/old')
+        create_link('y', 'https://j-shi.ng/go/z')
+        create_link('x', 'https://j-shi.ng/go/y')
+
+        final = ShortLink.objects.get(slug='z')
+        final.destination_url = 'https://example.com/new'
+        final.save()
+
+        self.assertEqual(ShortLink.objects.get(slug='x').resolved_url, 'https://example.com/new')
+        self.assertEqual(ShortLink.objects.get(slug='y').resolved_url, 'https://example.com/new')
+
+    def test_link_created_after_its_referrer_is_picked_up(self, send_ga4_event):
+        link = create_link('x', 'https://j-shi.ng/go/Caf%C3%A9')
+        self.assertEqual(link.resolved_url, '')
+
+        create_link('café', 'https://example.com/cafe')
+
+        self.assertEqual(ShortLink.objects.get(slug='x').resolved_url, 'https://example.com/cafe')
+
+    def test_deleting_downstream_link_unresolves_dependents(self, send_ga4_event):
+        final = create_link('y', 'https://example.com/final')
+        create_link('x', 'https://j-shi.ng/go/y')
+
+        final.delete()
+
+        link = ShortLink.objects.get(slug='x')
+        self.assertEqual(link.resolved_url, '')
+        self.assertEqual(link.resolved_chain, [])
+
+    def test_forwarding_link_does_not_skip_non_forwarding_hop(self, send_ga4_event):
+        create_link('y', 'https://example.com/final')
+        link = create_link('x', 'https://j-shi.ng/go/y', jump_type='forward')
+
+        self.assertEqual(link.resolved_url, '')
+        self.assertEqual(link.next_hop.slug, 'y')
+
+    def test_forwarding_chain_merges_parameters(self, send_ga4_event):
+        create_link('y', 'https://example.com/final?a=1', jump_type='forward')
+        create_link('x', 'https://j-shi.ng/go/y?b=2', jump_type='forward')
+
+        response = self.client.get('/go/x', {'c': '3'})
+        self.assertRedirects(
+            response, 'https://example.com/final?a=1&b=2&c=3', fetch_redirect_response=False
+        )
+
+    def test_inactive_hop_is_not_skipped(self, send_ga4_event):
+        create_link('y', 'https://example.com/final', is_active=False)
+        link = create_link('x', 'https://j-shi.ng/go/y')
+
+        self.assertEqual(link.resolved_url, '')
+
+    def test_prefix_links_are_never_resolved(self, send_ga4_event):
+        create_link('y', 'https://example.com/final')
+        link = create_link('p/', 'https://j-shi.ng/go/y', jump_type='prefix')
+
+        self.assertEqual(link.resolved_url, '')
+
+
+class LoopDetectionTests(TestCase):
+
+    def test_direct_loop_is_rejected(self):
+        create_link('y', 'https://j-shi.ng/go/x')
+        form = ShortLinkForm(form_data(slug='x', destination_url='https://j-shi.ng/go/y'))
+
+        self.assertFalse(form.is_valid())
+        self.assertIn('destination_url', form.errors)
+
+    def test_self_loop_is_rejected(self):
+        form = ShortLinkForm(form_data(slug='x', destination_url='https://www.j-shi.ng/go/X'))
+
+        self.assertFalse(form.is_valid())
+        self.assertIn('destination_url', form.errors)
+
+    def test_loop_through_scheduled_link_is_rejected(self):
+        future = (timezone.now() + timedelta(days=1)).strftime('%Y-%m-%dT%H:%M')
+        form = ShortLinkForm(form_data(slug='y', destination_url='https://j-shi.ng/go/x', active_from=future))
+        self.assertTrue(form.is_valid(), form.errors)
+        form.save()
+
+        form = ShortLinkForm(form_data(slug='x', destination_url='https://j-shi.ng/go/y'))
+        self.assertFalse(form.is_valid())
+        self.assertIn('destination_url', form.errors)
+
+    def test_prefix_link_pointing_under_its_own_prefix_is_rejected(self):
+        for destination in ['https://j-shi.ng/go/p/', 'https://j-shi.ng/go/p', 'https://j-shi.ng/go/p/sub']:
+            with self.subTest(destination=destination):
+                form = ShortLinkForm(form_data(slug='p/', destination_url=destination, jump_type='prefix'))
+                self.assertFalse(form.is_valid())
+                self.assertIn('destination_url', form.errors)
+
+    def test_prefix_link_closing_loop_with_existing_link_is_rejected(self):
+        create_link('a', 'https://j-shi.ng/go/q/a')
+        form = ShortLinkForm(form_data(slug='q/', destination_url='https://j-shi.ng/go/', jump_type='prefix'))
+
+        self.assertFalse(form.is_valid())
+        self.assertIn('destination_url', form.errors)
+
+    def test_exact_link_closing_loop_through_prefix_is_rejected(self):
+        create_link('q/', 'https://j-shi.ng/go/', jump_type='prefix')
+        form = ShortLinkForm(form_data(slug='a', destination_url='https://j-shi.ng/go/q/a'))
+
+        self.assertFalse(form.is_valid())
+        self.assertIn('destination_url', form.errors)
+
+    def test_expired_url_leading_back_to_link_is_rejected(self):
+        form = ShortLinkForm(form_data(slug='self', expired_url='https://j-shi.ng/go/self'))
+
+        self.assertFalse(form.is_valid())
+        self.assertIn('expired_url', form.errors)
+
+    def test_expired_url_leading_back_through_another_link_is_rejected(self):
+        create_link('other', 'https://j-shi.ng/go/self')
+        form = ShortLinkForm(form_data(slug='self', expired_url='https://j-shi.ng/go/other'))
+
+        self.assertFalse(form.is_valid())
+        self.assertIn('expired_url', form.errors)
+
+    def test_strict_exact_match_is_not_mistaken_for_loop(self):
+        create_link('Google', 'https://google.com', strict_match=True)
+        form = ShortLinkForm(form_data(slug='google', destination_url='https://j-shi.ng/go/Google'))
+
+        self.assertTrue(form.is_valid(), form.errors)
+        self.assertEqual(form.save().resolved_url, 'https://google.com')
+
+    def test_toggle_refuses_to_activate_looping_link(self):
+        # Direct saves bypass validation, so a loop can still reach the database
+        with self.assertLogs('shortener.routing', 'WARNING'):
+            create_link('y', 'https://j-shi.ng/go/x', is_active=False)
+            create_link('x', 'https://j-shi.ng/go/y')
+        user = User.objects.create_user('admin', password='password')
+        self.client.force_login(user)
+
+        link = ShortLink.objects.get(slug='y')
+        self.client.post(reverse('link_toggle', args=[link.pk]))
+
+        link.refresh_from_db()
+        self.assertFalse(link.is_active)
+
+
+@mock.patch('shortener.views.send_ga4_event')
+class SlugMatchingTests(TestCase):
+
+    def assertRedirectsTo(self, path, url):
+        response = self.client.get(path)
+        self.assertRedirects(response, url, fetch_redirect_response=False)
+
+    def test_case_and_trailing_slash_variants_match(self, send_ga4_event):
+        create_link('google', 'https://google.com')
+
+        for path in ['/go/google', '/go/Google', '/go/GOOGLE/', '/go/google//']:
+            with self.subTest(path=path):
+                self.assertRedirectsTo(path, 'https://google.com')
+
+    def test_percent_encoded_slug_matches_decoded_request(self, send_ga4_event):
+        create_link('caf%C3%A9', 'https://example.com/cafe')
+
+        self.assertRedirectsTo('/go/caf%C3%A9', 'https://example.com/cafe')
+        self.assertRedirectsTo('/go/CAFÉ', 'https://example.com/cafe')
+
+    def test_strict_link_only_matches_exact_slug(self, send_ga4_event):
+        create_link('Google', 'https://google.com', strict_match=True)
+
+        self.assertRedirectsTo('/go/Google', 'https://google.com')
+        self.assertEqual(self.client.get('/go/google').status_code, 404)
+        self.assertEqual(self.client.get('/go/Google/').status_code, 404)
+
+    def test_exact_slug_wins_over_loose_match(self, send_ga4_event):
+        create_link('google', 'https://google.com')
+        create_link('Google', 'https://google.co.uk', strict_match=True)
+
+        self.assertRedirectsTo('/go/Google', 'https://google.co.uk')
+        self.assertRedirectsTo('/go/GOOGLE', 'https://google.com')
+
+    def test_prefix_match_is_case_insensitive_and_keeps_extra_path(self, send_ga4_event):
+        create_link('docs/', 'https://docs.example.com', jump_type='prefix')
+
+        self.assertRedirectsTo('/go/Docs/Guide', 'https://docs.example.com/Guide')
+
+    def test_request_path_is_not_decoded_twice(self, send_ga4_event):
+        create_link('docs/', 'https://docs.example.com', jump_type='prefix')
+
+        self.assertRedirectsTo('/go/docs/a%253Fevil=1', 'https://docs.example.com/a%3Fevil=1')
+        self.assertRedirectsTo('/go/Docs/a%253Fevil=1', 'https://docs.example.com/a%3Fevil=1')
+        self.assertRedirectsTo('/go/docs/x%2523frag', 'https://docs.example.com/x%23frag')
+
+    def test_prefix_offset_accounts_for_case_folding(self, send_ga4_event):
+        create_link('strasse/', 'https://example.com', jump_type='prefix')
+
+        self.assertRedirectsTo('/go/Straße/page', 'https://example.com/page')
+
+    def test_near_duplicate_slug_is_rejected(self, send_ga4_event):
+        create_link('google', 'https://google.com')
+
+        form = ShortLinkForm(form_data(slug='Google'))
+        self.assertFalse(form.is_valid())
+        self.assertIn('slug', form.errors)
+
+        form = ShortLinkForm(form_data(slug='Google', strict_match=True))
+        self.assertTrue(form.is_valid(), form.errors)
+
+    def test_long_slug_fits_after_case_folding(self, send_ga4_event):
+        link = create_link('ß' * 255, 'https://example.com')
+
+        self.assertEqual(link.slug_normalized, 'ss' * 255)
+
+
+@mock.patch('shortener.views.send_ga4_event')
+class SweepSchedulesTests(TestCase):
+
+    def sweep(self):
+        out, err = StringIO(), StringIO()
+        call_command('sweep_schedules', stdout=out, stderr=err)
+        return err.getvalue()
+
+    def test_due_links_are_activated_and_expired(self, send_ga4_event):
+        now = timezone.now()
+        create_link('starting', 'https://example.com', is_active=False, active_from=now - timedelta(minutes=1))
+        create_link('waiting', 'https://example.com', is_active=False, active_from=now + timedelta(days=1))
+        create_link('ending', 'https://example.com', expires_at=now - timedelta(minutes=1))
+
+        self.sweep()
+
+        starting = ShortLink.objects.get(slug='starting')
+        self.assertTrue(starting.is_active)
+        self.assertIsNone(starting.active_from)
+        self.assertFalse(ShortLink.objects.get(slug='waiting').is_active)
+        ending = ShortLink.objects.get(slug='ending')
+        self.assertFalse(ending.is_active)
+        self.assertTrue(ending.is_expired)
+
+    def test_expired_link_redirects_to_fallback(self, send_ga4_event):
+        create_link(
+            'campaign', 'https://example.com/campaign',
+            expires_at=timezone.now() - timedelta(minutes=1),
+            expired_url='https://example.com/ended'
+        )
+
+        self.sweep()
+
+        response = self.client.get('/go/campaign')
+        self.assertRedirects(response, 'https://example.com/ended', fetch_redirect_response=False)
+
+    def test_manually_disabled_link_does_not_use_fallback(self, send_ga4_event):
+        link = create_link(
+            'campaign', 'https://example.com/campaign',
+            expires_at=timezone.now() + timedelta(days=1),
+            expired_url='https://example.com/ended'
+        )
+        user = User.objects.create_user('admin', password='password')
+        self.client.force_login(user)
+        self.client.post(reverse('link_toggle', args=[link.pk]))
+
+        ShortLink.objects.filter(pk=link.pk).update(expires_at=timezone.now() - timedelta(minutes=1))
+        self.sweep()
+
+        self.assertEqual(self.client.get('/go/campaign').status_code, 404)
+
+    def test_activation_recomputes_dependent_chains(self, send_ga4_event):
+        create_link('y', 'https://example.com/final', is_active=False, active_from=timezone.now() - timedelta(minutes=1))
+        create_link('x', 'https://j-shi.ng/go/y')
+        self.assertEqual(ShortLink.objects.get(slug='x').resolved_url, '')
+
+        self.sweep()
+
+        self.assertEqual(ShortLink.objects.get(slug='x').resolved_url, 'https://example.com/final')
+
+    def test_looping_link_is_refused_once(self, send_ga4_event):
+        with self.assertLogs('shortener.routing', 'WARNING'):
+            create_link('y', 'https://j-shi.ng/go/x', is_active=False, active_from=timezone.now() - timedelta(minutes=1))
+            create_link('x', 'https://j-shi.ng/go/y')
+
+        with self.assertLogs('shortener.routing', 'WARNING'):
+            self.assertIn('/go/y', self.sweep())
+        link = ShortLink.objects.get(slug='y')
+        self.assertFalse(link.is_active)
+        self.assertIsNone(link.active_from)
+
+        self.assertEqual(self.sweep(), '')
@@ -5,7 +5,6 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.views.decorators.http import require_http_methods
 from django.db.models import Q
-from urllib.parse import urlencode, urlparse, parse_qs, urlunparse
 import requests
 import uuid
 import threading
@@ -13,6 +12,7 @@ import logging
 import os
 from .models import ShortLink
 from .forms import ShortLinkForm
+from .routing import RedirectLoopError, build_destination, match_link, resolve_link
 
 logger = logging.getLogger(__name__)
 
@@ -57,78 +57,28 @@ def redirect_view(request, path):
     Handle /go/<path> redirects.
     Supports simple jumps, parameter forwarding, and prefix matching.
     Priority: exact matches (simple/forward) > prefix matches (prefix/prefix-forward)
+    Expired links with a fallback URL redirect there instead of returning 404.
+    Links pointing at other short links jump straight to the precomputed final destination.
     """
-    # First, try exact match with simple or forward mode
-    try:
-        short_link = ShortLink.objects.get(
-            slug=path, 
-            is_active=True,
-            jump_type__in=['simple', 'forward']
-        )
-        extra_path = ''
-    except ShortLink.DoesNotExist:
-        # If no exact match, try prefix matching
-        short_link = None
-        extra_path = ''
-        
-        # Look for prefix matches - find all prefix-type links that could match
-        prefix_links = ShortLink.objects.filter(
-            is_active=True,
-            jump_type__in=['prefix', 'prefix-forward'],
-            slug__endswith='/'
-        ).order_by('-slug')  # Order by slug descending to match longest prefix first
-        
-        for candidate in prefix_links:
-            # Check if the path starts with this prefix
-            if path.startswith(candidate.slug):
-                short_link = candidate
-                # Extract the extra path after the prefix
-                extra_path = path[len(candidate.slug):]
-                break
-        
-        if not short_link:
-            raise Http404("Short link not found")
-    
-    # Increment click counter
+    short_link, extra_path = match_link(path)
+    if not short_link:
+        raise Http404("Short link not found")
+    
+    # Increment click counter (including links skipped by the resolved chain)
     short_link.increment_clicks()
     
-    # Get the destination URL
-    destination = short_link.destination_url
-    
-    # Handle prefix modes: append extra path
-    if short_link.jump_type in ['prefix', 'prefix-forward'] and extra_path:
-        # Ensure destination ends with / if extra_path doesn't start with /
-        if not destination.endswith('/') and not extra_path.startswith('/'):
-            destination = destination + '/'
-        destination = destination + extra_path
-    
-    # If jump type is 'forward' or 'prefix-forward', append query parameters
-    if short_link.jump_type in ['forward', 'prefix-forward'] and request.GET:
-        # Parse the destination URL
-        parsed_url = urlparse(destination)
-        
-        # Get existing query parameters from destination
-        existing_params = parse_qs(parsed_url.query)
-        
-        # Merge with incoming parameters (incoming params take precedence)
-        merged_params = {**existing_params}
-        for key, value in request.GET.items():
-            merged_params[key] = [value]
-        
-        # Build new query string
-        # Flatten the list values (take first value for each key)
-        flat_params = {k: v[0] if isinstance(v, list) else v for k, v in merged_params.items()}
-        new_query = urlencode(flat_params)
-        
-        # Reconstruct URL with new query string
-        destination = urlunparse((
-            parsed_url.scheme,
-            parsed_url.netloc,
-            parsed_url.path,
-            parsed_url.params,
-            new_query,
-            parsed_url.fragment
-        ))
+    # Expired links only reach this point when they have a fallback URL
+    expired = not short_link.is_active
+    
+    if expired:
+        destination = short_link.expired_url
+    else:
+        destination = build_destination(
+            short_link.final_destination,
+            short_link.jump_type,
+            extra_path,
+            request.GET
+        )
     
     # Generate or get client ID for GA tracking
     client_id = request.COOKIES.get('_ga', str(uuid.uuid4()))
@@ -141,10 +91,24 @@ def redirect_view(request, path):
             'slug': short_link.slug,
             'destination_url': destination,
             'jump_type': short_link.jump_type,
+            'expired': expired,
             'protocol': 'http' if destination.startswith('http://') else 'https' if destination.startswith('https://') else 'other'
         }
     )
     
+    # Keep attribution for the short links the visitor no longer passes through
+    if not expired:
+        for hop in short_link.resolved_chain:
+            send_ga4_event(
+                client_id=client_id,
+                event_name='redirect',
+                event_params={
+                    'slug': hop['slug'],
+                    'destination_url': destination,
+                    'chained_from': short_link.slug,
+                }
+            )
+    
     # For non-HTTP protocols (mailto:, tel:, custom apps), render a redirect page
     # HTTP redirects don't work for these protocols in all browsers
     if not destination.startswith(('http://', 'https://')):
@@ -241,7 +205,27 @@ def link_delete(request, pk):
 def link_toggle_active(request, pk):
     """Toggle the active status of a link."""
     link = get_object_or_404(ShortLink, pk=pk)
+    
+    # Never switch on a link whose destination leads back to itself
+    if not link.is_active:
+        try:
+            resolve_link(link)
+        except RedirectLoopError as e:
+            messages.error(request, f'Cannot activate /go/{link.slug}: its destination leads back to itself: {e}')
+            return redirect('portal_home')
+    
     link.is_active = not link.is_active
+    
+    # A manual toggle is never an expiry, so a disabled link returns 404 rather than its fallback
+    link.is_expired = False
+    
+    # A manual enable overrides any pending schedule, so the sweeper
+    # does not immediately switch the link back off
+    if link.is_active:
+        link.active_from = None
+        if link.has_expired:
+            link.expires_at = None
+    
     link.save()
     
     status = "activated" if link.is_active else "deactivated"